@@ -1,14 +1,21 @@
 import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from operator import itemgetter
+import os
 from pathlib import Path
-import re
 import sys
 import tkinter as tk
+import numpy as np
 # ttk not needed here (no Treeview usage). Removed to avoid unused import warning.
 from PIL import Image, ImageTk
 from typing import List, Dict, Any, Optional, Tuple
 
 # Reuse data utilities from existing generation module
 from generate_screenshots import ensure_data, load_dataframe
+# Trade pairing and candle helpers shared with the labeling tool (which imports no GUI modules at load time)
+from label_screenshots import candle_columns, candle_number, pair_ids
 
 # ---------------------------------------------------------------------------
 # Helpers for locating processed folders
@@ -17,7 +24,7 @@ PROCESSED_DIR = Path('processed')
 
 
 def processed_base(ticker: str, interval: str, time_range: str) -> Path:
-    sanitized = re.sub(r'\s+', '', time_range.lower())
+    sanitized = ''.join(time_range.lower().split())
     return PROCESSED_DIR / f"{ticker.upper()}_{interval}_{sanitized}"
 
 
@@ -38,8 +45,21 @@ def build_processed_paths(ticker: str, interval: str, time_range: str):
 # ---------------------------------------------------------------------------
 
 def _file_numeric(name: str) -> int:
-    m = re.search(r'(\d+)', name)
-    return int(m.group(1)) if m else 10**12
+    num = candle_number(name)
+    return num if num >= 0 else 10**12
+
+
+def _list_candles(d: Path) -> List[Tuple[int, str]]:
+    """(candle number, name) for candle_*.png files in d, sorted numerically.
+    Names only: no per-entry stat or Path objects, and each name is parsed once.
+    """
+    if not d.is_dir():
+        return []
+    with os.scandir(d) as it:
+        items = [(_file_numeric(e.name), e.name) for e in it
+                 if e.name.startswith('candle_') and e.name.endswith('.png')]
+    items.sort(key=itemgetter(0))
+    return items
 
 
 def reconstruct_trades(paths: Dict[str, Path]) -> List[Dict[str, Any]]:
@@ -48,36 +68,32 @@ def reconstruct_trades(paths: Dict[str, Path]) -> List[Dict[str, Any]]:
     Pair each entry with next chronological exit of same side.
     Skip entries that have no later exit (i.e., open trades).
     """
-    buy_entries = sorted(paths['buy'].glob('candle_*.png'), key=lambda p: p.name)
-    buy_exits = sorted(paths['buy_exit'].glob('candle_*.png'), key=lambda p: p.name)
-    sell_entries = sorted(paths['sell'].glob('candle_*.png'), key=lambda p: p.name)
-    sell_exits = sorted(paths['sell_exit'].glob('candle_*.png'), key=lambda p: p.name)
-
-    def pair(entries: List[Path], exits: List[Path], side: str):
+    def pair(entry_dir: Path, exit_dir: Path, side: str):
+        entries = _list_candles(entry_dir)
+        if not entries:
+            return []
+        exits = _list_candles(exit_dir)
+        if not exits:
+            return []
+        # Lists are already in numeric order, so the id arrays are sorted
+        e_ids = np.fromiter((num for num, _ in entries), dtype=np.int64, count=len(entries))
+        x_ids = np.fromiter((num for num, _ in exits), dtype=np.int64, count=len(exits))
+        e_pos, x_pos = pair_ids(e_ids, x_ids)
         results = []
-        used = set()
-        for e in entries:
-            e_num = _file_numeric(e.name)
-            chosen = None
-            for x in exits:
-                if x in used:
-                    continue
-                x_num = _file_numeric(x.name)
-                if x_num > e_num:
-                    chosen = x
-                    used.add(x)
-                    break
-            if chosen is not None:
-                results.append({
-                    'side': side,
-                    'entry_file': e,
-                    'exit_file': chosen,
-                    'entry_num': e_num,
-                    'exit_num': _file_numeric(chosen.name)
-                })
+        # Paths are only built for the trades actually returned
+        for ei, xi in zip(e_pos.tolist(), x_pos.tolist()):
+            e_num, e_name = entries[ei]
+            x_num, x_name = exits[xi]
+            results.append({
+                'side': side,
+                'entry_file': entry_dir / e_name,
+                'exit_file': exit_dir / x_name,
+                'entry_num': e_num,
+                'exit_num': x_num
+            })
         return results
 
-    trades = pair(buy_entries, buy_exits, 'BUY') + pair(sell_entries, sell_exits, 'SELL')
+    trades = pair(paths['buy'], paths['buy_exit'], 'BUY') + pair(paths['sell'], paths['sell_exit'], 'SELL')
     # Sort chronologically by entry
     trades.sort(key=lambda t: t['entry_num'])
     return trades
@@ -88,67 +104,94 @@ def reconstruct_trades(paths: Dict[str, Path]) -> List[Dict[str, Any]]:
 # ---------------------------------------------------------------------------
 
 def filename_to_index(filename: str, total_rows: int) -> Optional[int]:
-    m = re.search(r'(\d+)', filename)
-    if not m:
-        return None
-    idx = int(m.group(1)) - 1
+    idx = candle_number(filename) - 1  # -1 (no number) falls outside the range below
     if 0 <= idx < total_rows:
         return idx
     return None
 
 
-def extract_candle(df, idx: int) -> Optional[Tuple[Any, Any, Any, Any, Any, Any]]:
+# ---------------------------------------------------------------------------
+# Thumbnail cache
+# ---------------------------------------------------------------------------
+THUMBS_DIRNAME = '.thumbs'
+PHOTO_CACHE_SIZE = 32  # PhotoImages kept alive by the viewer (LRU)
+
+
+def load_thumbnail(path: str, max_size: Tuple[int, int], thumb_dir: Optional[str] = None):
+    """Return a PIL image of path that fits max_size (None if unreadable).
+    Only successful loads are cached, so a read that fails transiently (e.g. a screenshot still
+    being written) is retried the next time the trade is shown.
+    """
     try:
-        if idx < 0 or idx >= len(df):
-            return None
-        row = df.iloc[idx]
-        cols = df.columns
-        if 'open_time' in cols:
-            ts = row['open_time']
-        elif 'close_time' in cols:
-            ts = row['close_time']
-        else:
-            try:
-                ts = df.index[idx]
-            except Exception:
-                ts = ''
-        def pick(*names):
-            for n in names:
-                if n in row:
-                    return row[n]
-            return ''
-        o = pick('Open', 'open')
-        h = pick('High', 'high')
-        low_v = pick('Low', 'low')
-        c = pick('Close', 'close')
-        v = pick('Volume', 'volume')
-        return ts, o, h, low_v, c, v
+        return _cached_thumbnail(path, max_size, thumb_dir)
     except Exception:
         return None
 
 
-def close_price(df, idx: int) -> float:
-    data = extract_candle(df, idx)
-    if not data:
-        return 0.0
-    _, _o, _h, _l, c, _v = data
-    try:
-        return float(c)
-    except Exception:
-        return 0.0
+@functools.lru_cache(maxsize=64)
+def _cached_thumbnail(path: str, max_size: Tuple[int, int], thumb_dir: Optional[str] = None):
+    """Memoized body of load_thumbnail; raises on unreadable images so failures are never cached.
+    Screenshots that already fit are decoded as-is and nothing is written. Oversized ones are
+    downscaled, and when thumb_dir is given the thumbnail is stored there as <stem>_<W>x<H>.png
+    on first use and read back on later runs as long as it is not older than the source screenshot.
+    """
+    src = Path(path)
+    thumb_path = None
+    with Image.open(src) as im:
+        if im.width <= max_size[0] and im.height <= max_size[1]:
+            im.load()
+            return im
+    if thumb_dir:
+        thumb_path = Path(thumb_dir) / f"{src.stem}_{max_size[0]}x{max_size[1]}.png"
+        if thumb_path.exists() and thumb_path.stat().st_mtime >= src.stat().st_mtime:
+            with Image.open(thumb_path) as im:
+                im.load()
+                return im
+    with Image.open(src) as im:
+        im.draft('RGB', max_size)  # no-op for PNG, reduced-scale decode for JPEG
+        im.thumbnail(max_size)
+    if thumb_path is not None:
+        try:
+            thumb_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so a concurrent prefetch never reads a partial file
+            tmp_path = thumb_path.with_name(f"{thumb_path.stem}.{os.getpid()}.{id(im)}.tmp")
+            im.save(tmp_path, format='PNG')
+            os.replace(tmp_path, thumb_path)
+        except Exception:
+            pass
+    return im
 
 
 # ---------------------------------------------------------------------------
 # Tkinter Application
 # ---------------------------------------------------------------------------
 class TradeViewerApp:
-    def __init__(self, root, trades: List[Dict[str, Any]], df):
+    def __init__(self, root, trades: List[Dict[str, Any]], df, thumb_dir: Optional[Path] = None):
         self.root = root
         self.trades = trades
         self.df = df
+        self.thumb_dir = thumb_dir
         self.index = 0  # index into self.trades
         self.left_photo = None
         self.right_photo = None
+        self._photo_cache: 'OrderedDict[Tuple[Path, Tuple[int, int]], ImageTk.PhotoImage]' = OrderedDict()
+        self._rendered: Dict[Tuple[str, str], Any] = {}  # (widget, option) -> last applied value
+        # Decodes neighbouring trades' thumbnails into load_thumbnail's cache off the Tk thread
+        self._pool = ThreadPoolExecutor(max_workers=2)
+        self._cols = candle_columns(df)
+        # filename -> dataframe row index, resolved once for every trade file
+        total_rows = len(df)
+        self._idx_cache: Dict[str, Optional[int]] = {}
+        for t in trades:
+            for key in ('entry_file', 'exit_file'):
+                name = t[key].name
+                if name not in self._idx_cache:
+                    self._idx_cache[name] = filename_to_index(name, total_rows)
+        # Per-trade display values computed once; navigation only indexes these lists
+        self._entry_strs: List[str] = []
+        self._exit_strs: List[str] = []
+        self._pnl: List[float] = []
+        self.precompute_details()
 
         self.root.title('Trade Screenshot Checker')
         self.root.configure(bg='#222222')
@@ -232,84 +275,155 @@ class TradeViewerApp:
             return self.trades[self.index]
         return None
 
+    def prefetch_neighbours(self, max_size=(560, 520)):
+        """Warm the thumbnail cache for the previous/next trade in the background.
+        Only PIL decoding happens on the worker; PhotoImage creation stays on the Tk thread.
+        """
+        thumb_dir = str(self.thumb_dir) if self.thumb_dir else None
+        for i in (self.index + 1, self.index - 1):
+            if 0 <= i < len(self.trades):
+                for key in ('entry_file', 'exit_file'):
+                    self._pool.submit(load_thumbnail, str(self.trades[i][key]), tuple(max_size), thumb_dir)
+
     def load_image(self, path: Path, max_size=(560, 520)):
+        key = (path, tuple(max_size))
+        photo = self._photo_cache.get(key)
+        if photo is not None:
+            self._photo_cache.move_to_end(key)
+            return photo
+        im = load_thumbnail(str(path), tuple(max_size), str(self.thumb_dir) if self.thumb_dir else None)
+        if im is None:
+            return None
+        photo = ImageTk.PhotoImage(im)
+        self._photo_cache[key] = photo
+        if len(self._photo_cache) > PHOTO_CACHE_SIZE:
+            self._photo_cache.popitem(last=False)
+        return photo
+
+    def extract_candle(self, idx: int) -> Optional[Tuple[Any, Any, Any, Any, Any, Any]]:
+        if idx < 0 or idx >= len(self.df):
+            return None
+        cols = self._cols
+        return tuple(cols[k][idx] if cols[k] is not None else ''
+                     for k in ('ts', 'open', 'high', 'low', 'close', 'volume'))
+
+    def close_price(self, idx: int) -> float:
+        close = self._cols['close']
+        if close is None or idx < 0 or idx >= len(close):
+            return 0.0
         try:
-            with Image.open(path) as im:
-                im.thumbnail(max_size)
-                return ImageTk.PhotoImage(im)
+            return float(close[idx])
         except Exception:
-            return None
+            return 0.0
 
     def format_candle(self, idx: Optional[int]):
         if idx is None:
             return '-'
-        data = extract_candle(self.df, idx)
+        data = self.extract_candle(idx)
         if not data:
             return '-'
         ts, o, h, low_v, c, v = data
         return f"{ts}  O:{o} H:{h} L:{low_v} C:{c} V:{v}"
 
+    def row_index(self, path: Path) -> Optional[int]:
+        name = path.name
+        if name not in self._idx_cache:
+            self._idx_cache[name] = filename_to_index(name, len(self.df))
+        return self._idx_cache[name]
+
     def compute_pnl(self, trade: Dict[str, Any]) -> float:
-        e_idx = filename_to_index(trade['entry_file'].name, len(self.df))
-        x_idx = filename_to_index(trade['exit_file'].name, len(self.df))
+        e_idx = self.row_index(trade['entry_file'])
+        x_idx = self.row_index(trade['exit_file'])
         if e_idx is None or x_idx is None:
             return 0.0
-        entry = close_price(self.df, e_idx)
-        exit_p = close_price(self.df, x_idx)
+        entry = self.close_price(e_idx)
+        exit_p = self.close_price(x_idx)
         if trade['side'] == 'BUY':
             return exit_p - entry
         else:
             return entry - exit_p
 
+    def precompute_details(self):
+        """Fill entry/exit candle strings and PnL for every trade (parallel to self.trades)."""
+        self._entry_strs = [self.format_candle(self.row_index(t['entry_file'])) for t in self.trades]
+        self._exit_strs = [self.format_candle(self.row_index(t['exit_file'])) for t in self.trades]
+        self._pnl = self.compute_all_pnl()
+
+    def compute_all_pnl(self):
+        """PnL for every trade in one vectorized pass: sign * (exit_close - entry_close),
+        sign = +1 for BUY and -1 for SELL. Trades whose rows are unresolved get 0.0.
+        """
+        close = self._cols['close']
+        if not self.trades or close is None:
+            return [self.compute_pnl(t) for t in self.trades]
+        try:
+            close_f = np.asarray(close, dtype=np.float64)
+        except (TypeError, ValueError):
+            return [self.compute_pnl(t) for t in self.trades]
+        def idx_array(key):
+            idxs = (self.row_index(t[key]) for t in self.trades)
+            return np.fromiter((-1 if i is None else i for i in idxs), dtype=np.int64, count=len(self.trades))
+        e_idx = idx_array('entry_file')
+        x_idx = idx_array('exit_file')
+        signs = np.where(np.array([t['side'] for t in self.trades]) == 'BUY', 1.0, -1.0)
+        valid = (e_idx >= 0) & (x_idx >= 0)
+        pnl = signs * (close_f[x_idx] - close_f[e_idx])
+        return np.where(valid, pnl, 0.0)
+
+    def _set(self, widget, **options):
+        """Configure only the options whose value differs from what was last applied."""
+        changed = {}
+        for key, value in options.items():
+            slot = (str(widget), key)
+            if slot in self._rendered and self._rendered[slot] == value:
+                continue
+            self._rendered[slot] = value
+            changed[key] = value
+        if changed:
+            widget.config(**changed)
+
     def refresh_display(self):
         trade = self.current_trade()
         if not trade:
-            self.left_label.config(text='No closed trades found.', image='')
-            self.right_label.config(text='', image='')
-            self.status.config(text='')
-            self.entry_file_label.config(text='Entry File: -')
-            self.exit_file_label.config(text='Exit File: -')
-            self.entry_candle_label.config(text='Entry Candle: -')
-            self.exit_candle_label.config(text='Exit Candle: -')
-            self.pnl_label.config(text='Result: -')
-            self.btn_back.config(state=tk.DISABLED)
-            self.btn_next.config(state=tk.DISABLED)
+            self._set(self.left_label, text='No closed trades found.', image='')
+            self._set(self.right_label, text='', image='')
+            self._set(self.status, text='')
+            self._set(self.entry_file_label, text='Entry File: -')
+            self._set(self.exit_file_label, text='Exit File: -')
+            self._set(self.entry_candle_label, text='Entry Candle: -')
+            self._set(self.exit_candle_label, text='Exit Candle: -')
+            self._set(self.pnl_label, text='Result: -')
+            self._set(self.btn_back, state=tk.DISABLED)
+            self._set(self.btn_next, state=tk.DISABLED)
             return
 
         # Images
         self.left_photo = self.load_image(trade['entry_file'])
         self.right_photo = self.load_image(trade['exit_file'])
         if self.left_photo:
-            self.left_label.config(image=self.left_photo, text='')
+            self._set(self.left_label, image=self.left_photo, text='')
         else:
-            self.left_label.config(text=f"Missing {trade['entry_file'].name}")
+            self._set(self.left_label, text=f"Missing {trade['entry_file'].name}")
         if self.right_photo:
-            self.right_label.config(image=self.right_photo, text='')
+            self._set(self.right_label, image=self.right_photo, text='')
         else:
-            self.right_label.config(text=f"Missing {trade['exit_file'].name}")
+            self._set(self.right_label, text=f"Missing {trade['exit_file'].name}")
 
         # Status
-        self.status.config(text=f"Trade {self.index+1}/{len(self.trades)}  {trade['side']}  {trade['entry_file'].name} -> {trade['exit_file'].name}")
-
-        # Candle details
-        e_idx = filename_to_index(trade['entry_file'].name, len(self.df))
-        x_idx = filename_to_index(trade['exit_file'].name, len(self.df))
-        self.entry_file_label.config(text=f"Entry File: {trade['entry_file'].name}")
-        self.exit_file_label.config(text=f"Exit File:  {trade['exit_file'].name}")
-        self.entry_candle_label.config(text=f"Entry Candle: {self.format_candle(e_idx)}")
-        self.exit_candle_label.config(text=f"Exit Candle:  {self.format_candle(x_idx)}")
-        pnl = self.compute_pnl(trade)
-        self.pnl_label.config(text=f"Result: {pnl:.2f}")
+        self._set(self.status, text=f"Trade {self.index+1}/{len(self.trades)}  {trade['side']}  {trade['entry_file'].name} -> {trade['exit_file'].name}")
+
+        # Candle details (precomputed in precompute_details)
+        self._set(self.entry_file_label, text=f"Entry File: {trade['entry_file'].name}")
+        self._set(self.exit_file_label, text=f"Exit File:  {trade['exit_file'].name}")
+        self._set(self.entry_candle_label, text=f"Entry Candle: {self._entry_strs[self.index]}")
+        self._set(self.exit_candle_label, text=f"Exit Candle:  {self._exit_strs[self.index]}")
+        pnl = self._pnl[self.index]
+        self._set(self.pnl_label, text=f"Result: {pnl:.2f}")
 
         # Nav button states
-        if self.index <= 0:
-            self.btn_back.config(state=tk.DISABLED)
-        else:
-            self.btn_back.config(state=tk.NORMAL)
-        if self.index >= len(self.trades) - 1:
-            self.btn_next.config(state=tk.DISABLED)
-        else:
-            self.btn_next.config(state=tk.NORMAL)
+        self._set(self.btn_back, state=tk.DISABLED if self.index <= 0 else tk.NORMAL)
+        self._set(self.btn_next, state=tk.DISABLED if self.index >= len(self.trades) - 1 else tk.NORMAL)
+        self.prefetch_neighbours()
 
     def next_trade(self):
         if self.index < len(self.trades) - 1:
@@ -321,6 +435,10 @@ class TradeViewerApp:
             self.index -= 1
             self.refresh_display()
 
+    def close(self):
+        """Drop pending prefetches so interpreter exit does not wait on them."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
 
 # ---------------------------------------------------------------------------
 # CLI / main
@@ -347,8 +465,9 @@ def main():
     trades = reconstruct_trades(paths)
 
     root = tk.Tk()
-    TradeViewerApp(root, trades, df)
+    app = TradeViewerApp(root, trades, df, thumb_dir=paths['base'] / THUMBS_DIRNAME)
     root.mainloop()
+    app.close()
     return 0
 
 
@@ -1,9 +1,12 @@
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-import re
 from typing import Literal
 
 try:
@@ -32,6 +35,36 @@ INTERVALS = {
     '1M': '1M',
 }
 
+# Fixed interval lengths in milliseconds ('1M' varies with the month and is paged sequentially)
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 3_600_000,
+    '2h': 2 * 3_600_000,
+    '4h': 4 * 3_600_000,
+    '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000,
+    '12h': 12 * 3_600_000,
+    '1d': 86_400_000,
+    '3d': 3 * 86_400_000,
+    '1w': 7 * 86_400_000,
+}
+
+KLINE_COLUMNS = [
+    'open_time', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_asset_volume', 'number_of_trades',
+    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+]
+KLINE_INT_COLUMNS = ('open_time', 'close_time', 'number_of_trades')
+KLINE_TIME_COLUMNS = ('open_time', 'close_time')
+
+BINANCE_PAGE_LIMIT = 1000
+# Number of kline pages requested concurrently (next pages download while earlier ones are consumed)
+BINANCE_PREFETCH = 4
+
 def parse_time_interval(interval_str):
     # Accepts things like '1 month', '1 year', '3 days', etc.
     num, unit = interval_str.split()
@@ -50,6 +83,54 @@ def parse_time_interval(interval_str):
     else:
         raise ValueError(f"Unknown time unit: {unit}")
 
+def _binance_session() -> requests.Session:
+    """Keep-alive session sized for the prefetch pool, with gzip bodies and retry on throttling."""
+    session = requests.Session()
+    session.headers.update({'Accept-Encoding': 'gzip', 'User-Agent': 'candle_to_screenshot/1.0'})
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=BINANCE_PREFETCH, max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+def _fetch_klines_page(session: requests.Session, params: dict) -> list:
+    response = session.get(BINANCE_BASE_URL, params=params)
+    response.raise_for_status()
+    return response.json()
+
+def download_binance_klines(symbol: str, interval: str, start_ms: int, end_ms: int) -> list:
+    """Return raw kline rows for [start_ms, end_ms] in chronological order.
+
+    For fixed-length intervals the range is split up front into windows of exactly one page
+    (BINANCE_PAGE_LIMIT candles), so pages are fetched by a small thread pool while earlier
+    pages are being consumed. '1M' has no fixed length and falls back to chaining each page
+    from the last open_time of the previous one.
+    """
+    base_params = {'symbol': symbol.upper(), 'interval': interval, 'limit': BINANCE_PAGE_LIMIT}
+    all_data = []
+    with _binance_session() as session:
+        step = INTERVAL_MS.get(interval)
+        if step:
+            span = step * BINANCE_PAGE_LIMIT
+            windows = [
+                dict(base_params, startTime=w_start, endTime=min(w_start + span - 1, end_ms))
+                for w_start in range(start_ms, end_ms + 1, span)
+            ]
+            with ThreadPoolExecutor(max_workers=BINANCE_PREFETCH) as pool:
+                # map() yields in submission order, so rows stay chronological
+                for data in pool.map(lambda params: _fetch_klines_page(session, params), windows):
+                    all_data.extend(data)
+            return all_data
+        params = dict(base_params, startTime=start_ms, endTime=end_ms)
+        while True:
+            data = _fetch_klines_page(session, params)
+            if not data:
+                break
+            all_data.extend(data)
+            if len(data) < params['limit']:
+                break
+            params['startTime'] = data[-1][0] + 1
+    return all_data
+
 def download_ohlc(symbol: str, interval: str, time_interval: str, source: Literal['binance','forex']='binance'):
     """Download OHLC data either from Binance (crypto) or via yfinance (forex / equities).
 
@@ -67,33 +148,17 @@ def download_ohlc(symbol: str, interval: str, time_interval: str, source: Litera
         start_time = end_time - parse_time_interval(time_interval)
         start_ms = int(start_time.timestamp() * 1000)
         end_ms = int(end_time.timestamp() * 1000)
-        url = BINANCE_BASE_URL
-        params = {
-            'symbol': symbol.upper(),
-            'interval': interval,
-            'startTime': start_ms,
-            'endTime': end_ms,
-            'limit': 1000
+        all_data = download_binance_klines(symbol, interval, start_ms, end_ms)
+        # Typed columns straight from one 2D object array (prices arrive as JSON strings)
+        arr = np.asarray(all_data, dtype=object).reshape(-1, len(KLINE_COLUMNS))
+        columns = {
+            col: arr[:, i].astype(np.int64 if col in KLINE_INT_COLUMNS else np.float64)
+            for i, col in enumerate(KLINE_COLUMNS)
         }
-        all_data = []
-        while True:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            if not data:
-                break
-            all_data.extend(data)
-            if len(data) < params['limit']:
-                break
-            params['startTime'] = data[-1][0] + 1
-        df = pd.DataFrame(all_data, columns=[
-            'open_time', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-        ])
-        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
-        df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
-        return df
+        # Epoch milliseconds reinterpreted as datetime64 directly (no to_datetime parsing)
+        for col in KLINE_TIME_COLUMNS:
+            columns[col] = columns[col].view('datetime64[ms]').astype('datetime64[ns]')
+        return pd.DataFrame(columns)
 
     # Forex via yfinance
     if source == 'forex':
@@ -150,19 +215,23 @@ def download_ohlc(symbol: str, interval: str, time_interval: str, source: Litera
 
         delta = interval_to_delta(yf_interval)
 
-        # Build output incrementally to avoid 2D array surprises
-        out = data[['open', 'high', 'low', 'close']].copy()
-        out['volume'] = data['volume'].fillna(0).astype(float)
-        out.insert(0, 'open_time', out.index)
-        out['close_time'] = out['open_time'] + delta
-        out['quote_asset_volume'] = 0
-        out['number_of_trades'] = 0
-        out['taker_buy_base_asset_volume'] = 0
-        out['taker_buy_quote_asset_volume'] = 0
-        out['ignore'] = 0
-        # Round OHLC values to 4 decimal places for forex consistency
-        out[['open','high','low','close']] = out[['open','high','low','close']].astype(float).round(4)
-        out = out[['open_time','open','high','low','close','volume','close_time','quote_asset_volume','number_of_trades','taker_buy_base_asset_volume','taker_buy_quote_asset_volume','ignore']]
+        # Build every column once and construct the frame in a single call (OHLC rounded to 4 dp for forex)
+        open_time = data.index
+        zeros = np.zeros(len(data), dtype=np.int64)
+        out = pd.DataFrame({
+            'open_time': open_time,
+            'open': data['open'].to_numpy(dtype=float).round(4),
+            'high': data['high'].to_numpy(dtype=float).round(4),
+            'low': data['low'].to_numpy(dtype=float).round(4),
+            'close': data['close'].to_numpy(dtype=float).round(4),
+            'volume': data['volume'].fillna(0).to_numpy(dtype=float),
+            'close_time': open_time + delta,
+            'quote_asset_volume': zeros,
+            'number_of_trades': zeros,
+            'taker_buy_base_asset_volume': zeros,
+            'taker_buy_quote_asset_volume': zeros,
+            'ignore': zeros,
+        }, index=data.index, columns=KLINE_COLUMNS)
         return out
 
     raise ValueError(f"Unknown source: {source}")
@@ -178,7 +247,7 @@ def main():
     df = download_ohlc(args.ticker, args.interval, args.time, source=args.source)
 
     # Sanitize time string for filename (e.g. "1 month" -> "1month")
-    sanitized_time = re.sub(r'\s+', '', args.time.lower())
+    sanitized_time = ''.join(args.time.lower().split())
     suffix = 'fx' if args.source == 'forex' else 'spot'
     filename = f"{args.ticker.upper()}_{args.interval}_{sanitized_time}_{suffix}.csv"
     data_dir = Path('data')
@@ -1,18 +1,52 @@
 import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+import os
 from pathlib import Path
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
-import mplfinance as mpf
-import re
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from PIL import Image
 import shutil
-from typing import Literal
+from typing import List, Literal, Optional
 from download_ohlc import download_ohlc  # direct function import
 
 DATA_DIR = Path('data')
 SCREENSHOTS_DIR = Path('screenshots')
 
+# Candle palette (same colors as mplfinance's 'charles' style used previously)
+CANDLE_UP_COLOR = '#006340'
+CANDLE_DOWN_COLOR = '#a02128'
+CANDLE_BODY_WIDTH = 0.6
+_UP_RGBA = np.array(to_rgba(CANDLE_UP_COLOR))
+_DOWN_RGBA = np.array(to_rgba(CANDLE_DOWN_COLOR))
+_UP_RGB8 = np.round(_UP_RGBA[:3] * 255).astype(np.uint8)
+_DOWN_RGB8 = np.round(_DOWN_RGBA[:3] * 255).astype(np.uint8)
+# Output pixel size; matches the labeling UI display box so no downscale is needed there
+SCREENSHOT_SIZE = (560, 480)
+SCREENSHOT_DPI = 100
+PNG_COMPRESS_LEVEL = 1  # fast zlib level; candle charts are mostly flat color and still compress well
+JPEG_QUALITY = 80
+RENDER_CHUNKSIZE = 32  # frames handed to a worker per IPC round-trip
+WRITE_AHEAD = 2  # encoded-but-unsaved frames allowed per render batch (double buffering)
+# --format npy: all frames in one (N, H, W, 3) uint8 tensor plus the candle number of each frame
+FRAMES_NPY = 'frames.npy'
+FRAME_NUMBERS_NPY = 'frame_candles.npy'
+# CSV columns read by the renderer and the labeling tools (the trailing kline statistics are skipped)
+CSV_COLUMNS = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')
+CSV_DTYPES = {'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64', 'volume': 'float64'}
+
+_CANVAS = None  # per-process dict of reusable figure/artists, created on first render
+_FRAME_STORES = {}  # per-process npy path -> writable memmap of the frame tensor
+
 def build_data_filename(ticker: str, interval: str, time_range: str, source: Literal['binance', 'forex']) -> Path:
     """Return preferred CSV filename including source suffix (spot/fx)."""
-    sanitized_time = re.sub(r'\s+', '', time_range.lower())
+    sanitized_time = ''.join(time_range.lower().split())
     suffix = 'fx' if source == 'forex' else 'spot'
     filename = f"{ticker.upper()}_{interval}_{sanitized_time}_{suffix}.csv"
     return DATA_DIR / filename
@@ -30,13 +64,15 @@ def ensure_data(ticker: str, interval: str, time_range: str, refresh: bool, sour
 
 
 def load_dataframe(csv_path: Path) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
-    # Expect columns open_time, open, high, low, close, volume, ...
+    # Expect columns open_time, open, high, low, close, volume, ...; explicit dtypes skip type
+    # inference, and close_time stays the raw string the viewers display
+    df = pd.read_csv(csv_path, usecols=lambda c: c in CSV_COLUMNS, dtype=CSV_DTYPES, engine='c')
     if 'open_time' not in df.columns:
         raise ValueError("CSV missing 'open_time' column.")
-    df['open_time'] = pd.to_datetime(df['open_time'])
+    # to_csv writes ISO timestamps (with an offset for forex), so skip per-row format inference
+    df['open_time'] = pd.to_datetime(df['open_time'], format='ISO8601')
     df = df.set_index('open_time')
-    # Rename to match typical OHLC naming expected by mplfinance
+    # Rename to capitalized OHLC naming used by the renderer and labeling tools
     rename_map = {
         'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
     }
@@ -48,8 +84,174 @@ def load_dataframe(csv_path: Path) -> pd.DataFrame:
     return df
 
 
-def generate_screenshots(df: pd.DataFrame, ticker: str, interval: str, time_range: str, start_skip: int = 480, max_candles: int = 96):
-    sanitized_time = re.sub(r'\s+', '', time_range.lower())
+def geometry_buffers(n: int) -> dict:
+    """Preallocated artist arrays for windows of n candles at x = 0..n-1.
+    The x coordinates never change for a given n, so they are filled here once.
+    """
+    x = np.arange(n, dtype=float)
+    half = CANDLE_BODY_WIDTH / 2
+    wicks = np.empty((n, 2, 2))
+    wicks[:, :, 0] = x[:, None]
+    bodies = np.empty((n, 4, 2))
+    bodies[:, 0, 0] = bodies[:, 1, 0] = x - half
+    bodies[:, 2, 0] = bodies[:, 3, 0] = x + half
+    return {'wicks': wicks, 'bodies': bodies, 'up': np.empty(n, dtype=bool), 'colors': np.empty((n, 4))}
+
+
+def candle_geometry(o: np.ndarray, h: np.ndarray, low: np.ndarray, c: np.ndarray, buf: Optional[dict] = None):
+    """Vectorized artist data for one window of candles placed at x = 0..N-1.
+    Writes into buf (from geometry_buffers(N)) without temporaries; a fresh one is made if omitted.
+    Returns (wick segments (N,2,2), body vertices (N,4,2), up mask (N,), RGBA colors (N,4)).
+    """
+    if buf is None:
+        buf = geometry_buffers(len(o))
+    wicks, bodies, up, colors = buf['wicks'], buf['bodies'], buf['up'], buf['colors']
+    np.copyto(wicks[:, 0, 1], low)
+    np.copyto(wicks[:, 1, 1], h)
+    np.minimum(o, c, out=bodies[:, 0, 1])
+    np.copyto(bodies[:, 3, 1], bodies[:, 0, 1])
+    np.maximum(o, c, out=bodies[:, 1, 1])
+    np.copyto(bodies[:, 2, 1], bodies[:, 1, 1])
+    np.greater_equal(c, o, out=up)
+    colors[:] = _DOWN_RGBA
+    colors[up] = _UP_RGBA
+    return wicks, bodies, up, colors
+
+
+def _init_canvas():
+    """Create the reusable Agg figure with empty wick/body collections.
+    Axes fill the whole figure, so no tight-bbox pass is needed to crop padding.
+    Frames only mutate the collections' data and the y-limits; the x-limits are
+    touched only when the window length changes.
+    """
+    width, height = SCREENSHOT_SIZE
+    fig = Figure(figsize=(width / SCREENSHOT_DPI, height / SCREENSHOT_DPI), dpi=SCREENSHOT_DPI, facecolor='white')
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    wick_coll = LineCollection([], linewidths=1.0)
+    body_coll = PolyCollection([], linewidths=0.5)
+    ax.add_collection(wick_coll)
+    ax.add_collection(body_coll)
+    # 'geometry' maps window length -> geometry_buffers(n), reused across frames
+    return {'fig': fig, 'canvas': canvas, 'ax': ax, 'wicks': wick_coll, 'bodies': body_coll, 'n': None, 'geometry': {}}
+
+
+def _render_frame(window: np.ndarray) -> np.ndarray:
+    """Draw an (N, 4) Open/High/Low/Close window and return the (H, W, 4) RGBA canvas buffer.
+    The buffer is only valid until the next draw. Each process builds its canvas once.
+    """
+    global _CANVAS
+    if _CANVAS is None:
+        _CANVAS = _init_canvas()
+    state = _CANVAS
+    o, h, low, c = window.T
+    buf = state['geometry'].get(len(o))
+    if buf is None:
+        buf = state['geometry'][len(o)] = geometry_buffers(len(o))
+    wicks, bodies, _up, colors = candle_geometry(o, h, low, c, buf)
+    state['wicks'].set_segments(wicks)
+    state['wicks'].set_color(colors)
+    state['bodies'].set_verts(bodies)
+    state['bodies'].set_facecolor(colors)
+    state['bodies'].set_edgecolor(colors)
+    ax = state['ax']
+    if state['n'] != len(wicks):
+        state['n'] = len(wicks)
+        ax.set_xlim(-1, len(wicks))
+    lo = np.nanmin(low)
+    hi = np.nanmax(h)
+    pad = (hi - lo) * 0.05 or abs(hi) * 0.001 or 1.0
+    ax.set_ylim(lo - pad, hi + pad)
+    canvas = state['canvas']
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())
+
+
+def rasterize_candles(window: np.ndarray) -> np.ndarray:
+    """Draw an (N, 4) Open/High/Low/Close window straight into an (H, W, 3) uint8 array.
+    Uses the same data-to-pixel mapping as the Agg renderer (x in [-1, N], y padded by 5%)
+    but fills wicks and bodies as 1px columns / solid rectangles without anti-aliasing,
+    skipping matplotlib entirely.
+    """
+    width, height = SCREENSHOT_SIZE
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    o, h, low, c = window.T
+    n = len(o)
+    lo = np.nanmin(low)
+    hi = np.nanmax(h)
+    pad = (hi - lo) * 0.05 or abs(hi) * 0.001 or 1.0
+    y0, y1 = lo - pad, hi + pad
+    x_scale = width / (n + 1)
+    y_scale = height / (y1 - y0)
+
+    def px_y(v):
+        return np.clip(np.round((y1 - v) * y_scale), 0, height - 1).astype(np.int64)
+    x = np.arange(n)
+    cx = np.clip(np.round((x + 1) * x_scale), 0, width - 1).astype(np.int64)
+    half = CANDLE_BODY_WIDTH / 2
+    bx0 = np.clip(np.round((x + 1 - half) * x_scale), 0, width - 1).astype(np.int64)
+    bx1 = np.clip(np.round((x + 1 + half) * x_scale), 0, width - 1).astype(np.int64)
+    wick_top, wick_bot = px_y(h), px_y(low)
+    body_top, body_bot = px_y(np.maximum(o, c)), px_y(np.minimum(o, c))
+    colors = np.where((c >= o)[:, None], _UP_RGB8, _DOWN_RGB8)
+    valid = ~(np.isnan(o) | np.isnan(h) | np.isnan(low) | np.isnan(c))
+    for k in np.flatnonzero(valid).tolist():
+        color = colors[k]
+        img[wick_top[k]:wick_bot[k] + 1, cx[k]] = color
+        img[body_top[k]:body_bot[k] + 1, bx0[k]:bx1[k] + 1] = color
+    return img
+
+
+def _frame_rgb(window: np.ndarray, renderer: str) -> np.ndarray:
+    """(H, W, 3) frame for window from the chosen renderer ('agg' or 'raster')."""
+    if renderer == 'raster':
+        return rasterize_candles(window)
+    return _render_frame(window)[..., :3]
+
+
+def _render_batch(tasks) -> List[str]:
+    """Render a batch of (window, out_path, save_opts, renderer) tasks, overlapping drawing with encoding:
+    a writer thread encodes/saves frame k (Pillow releases the GIL in zlib/JPEG) while frame k+1
+    is drawn. At most WRITE_AHEAD saves are pending, and all have finished when the batch returns.
+    """
+    done = []
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for window, out_path, save_opts, renderer in tasks:
+            # Agg frames are a view of the canvas buffer; fromarray copies it before the next draw
+            im = Image.fromarray(np.ascontiguousarray(_frame_rgb(window, renderer)), 'RGB')
+            pending.append(writer.submit(im.save, out_path, **save_opts))
+            done.append(out_path)
+            if len(pending) > WRITE_AHEAD:
+                pending.popleft().result()
+        for fut in pending:
+            fut.result()
+    return done
+
+
+def _batched(iterable, n: int):
+    it = iter(iterable)
+    while batch := list(islice(it, n)):
+        yield batch
+
+
+def _render_into_store(task) -> str:
+    """Render one (window, npy_path, frame_idx, renderer) task straight into the memory-mapped frame tensor."""
+    window, store_path, k, renderer = task
+    store = _FRAME_STORES.get(store_path)
+    if store is None:
+        store = _FRAME_STORES[store_path] = np.load(store_path, mmap_mode='r+')
+    store[k] = _frame_rgb(window, renderer)
+    return f"{store_path}[{k}]"
+
+
+def generate_screenshots(df: pd.DataFrame, ticker: str, interval: str, time_range: str, start_skip: int = 480, max_candles: int = 96, workers: Optional[int] = None, image_format: Literal['png', 'jpg', 'npy'] = 'png', png_compress: int = PNG_COMPRESS_LEVEL, renderer: Literal['agg', 'raster'] = 'agg') -> List[Path]:
+    """Render one screenshot per candle after start_skip into the ticker's screenshot folder.
+    Returns the candle image paths in candle order (empty for npy output or too little data),
+    so callers need not rescan the folder they were just written to.
+    """
+    sanitized_time = ''.join(time_range.lower().split())
     base_folder = SCREENSHOTS_DIR / f"{ticker.upper()}_{interval}_{sanitized_time}"
     # Clean existing folder to avoid stale images influencing downstream ML processes
     if base_folder.exists():
@@ -62,35 +264,63 @@ def generate_screenshots(df: pd.DataFrame, ticker: str, interval: str, time_rang
     total = len(df)
     if total <= start_skip:
         print(f"[WARN] Not enough candles ({total}) to start after skip={start_skip}. No screenshots created.")
-        return
+        return []
     print(f"[INFO] Generating {total - start_skip} screenshots (skipping first {start_skip} of {total} candles)...")
+    ohlc = df[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float)
     # Iterate from start_skip+1 to total inclusive to include each new candle
-    for i in range(start_skip + 1, total + 1):
-        # Determine subset up to i, but capped to last max_candles candles
-        window_start = max(0, i - max_candles)
-        subset = df.iloc[window_start:i]
-        out_file = base_folder / f"candle_{i:05d}.png"
-        if out_file.exists():
-            # Skip if already exists (idempotency)
-            continue
-        # Create the candlestick plot but suppress axes for ML friendliness
-        fig, axlist = mpf.plot(
-            subset,
-            type='candle',
-            style='charles',
-            returnfig=True,
-            axisoff=True,
-        )
-        # axisoff removes axes but ensure no leftover padding or labels
-        for ax in (axlist if isinstance(axlist, (list, tuple)) else [axlist]):
-            ax.set_axis_off()
-        fig.savefig(out_file, bbox_inches='tight', pad_inches=0)
-        # Explicitly close to free memory when generating many images
-        import matplotlib.pyplot as plt  # local import to avoid overhead if not used elsewhere
-        plt.close(fig)
-        if i % 100 == 0 or i == total:
-            print(f"[INFO] Saved {i - start_skip}/{total - start_skip} -> {out_file}")
+    # (the folder was just cleaned, so every frame is rendered)
+    ext = 'jpg' if image_format == 'jpg' else 'png'
+    frames = range(start_skip + 1, total + 1)
+    # Each window covers up to i, capped to the last max_candles candles. All full-length windows are
+    # one strided view of shape (total - max_candles + 1, max_candles, 4); only the ramp-up frames
+    # (i < max_candles) fall back to a plain prefix slice.
+    full_windows = None
+    if total >= max_candles:
+        full_windows = sliding_window_view(ohlc, max_candles, axis=0).transpose(0, 2, 1)
+
+    def window(i: int) -> np.ndarray:
+        if full_windows is not None and i >= max_candles:
+            return full_windows[i - max_candles]
+        return ohlc[:i]
+
+    store_path = None
+    if image_format == 'npy':
+        # Allocate the whole tensor up front; workers reopen it read-write and fill their frames
+        store_path = str(base_folder / FRAMES_NPY)
+        width, height = SCREENSHOT_SIZE
+        np.lib.format.open_memmap(store_path, mode='w+', dtype=np.uint8, shape=(len(frames), height, width, 3)).flush()
+        np.save(base_folder / FRAME_NUMBERS_NPY, np.asarray(frames, dtype=np.int64))
+        tasks = ((window(i), store_path, k, renderer) for k, i in enumerate(frames))
+    else:
+        if image_format == 'jpg':
+            save_opts = {'format': 'JPEG', 'quality': JPEG_QUALITY}
+        else:
+            save_opts = {'format': 'PNG', 'compress_level': png_compress}
+        # Image files are rendered in batches so each batch can pipeline drawing and encoding
+        tasks = _batched(((window(i), str(base_folder / f"candle_{i:05d}.{ext}"), save_opts, renderer) for i in frames), RENDER_CHUNKSIZE)
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    if store_path is not None:
+        results = pool.map(_render_into_store, tasks, chunksize=RENDER_CHUNKSIZE) if pool else map(_render_into_store, tasks)
+    else:
+        results = chain.from_iterable(pool.map(_render_batch, tasks) if pool else map(_render_batch, tasks))
+    try:
+        for i, out_file in zip(frames, results):
+            if i % 100 == 0 or i == total:
+                print(f"[INFO] Saved {i - start_skip}/{total - start_skip} -> {out_file}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if store_path is not None:
+            store = _FRAME_STORES.pop(store_path, None)
+            if store is not None:
+                store.flush()
     print(f"[DONE] Screenshots saved under {base_folder}")
+    if store_path is not None:
+        return []
+    return [base_folder / f"candle_{i:05d}.{ext}" for i in frames]
 
 
 def main():
@@ -102,11 +332,15 @@ def main():
     parser.add_argument('--refresh', action='store_true', help='Re-fetch data even if CSV already exists')
     parser.add_argument('--skip', type=int, default=480, help='Number of initial candles to skip for screenshot generation (default 480)')
     parser.add_argument('--max-candles', type=int, default=96, dest='max_candles', help='Maximum number of most recent candles to display in each screenshot window (default 96 = 1 day of 15m candles)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes used for rendering (default: CPU count; 1 renders in-process)')
+    parser.add_argument('--format', choices=['png', 'jpg', 'npy'], default='png', dest='image_format', help='png: one candle_#####.png per frame (needed by the labeling tools); jpg: candle_#####.jpg (q80, fastest encode); npy: a single memory-mapped frames.npy tensor for ML pipelines')
+    parser.add_argument('--png-compress', type=int, choices=range(0, 10), default=PNG_COMPRESS_LEVEL, dest='png_compress', metavar='0-9', help=f'zlib level for PNG output (default {PNG_COMPRESS_LEVEL}: fast encode, slightly larger files)')
+    parser.add_argument('--renderer', choices=['agg', 'raster'], default='agg', help='agg: anti-aliased matplotlib rendering (default); raster: direct NumPy pixel fills, much faster, no anti-aliasing')
     args = parser.parse_args()
 
     csv_path = ensure_data(args.ticker, args.interval, args.time, args.refresh, args.source)
     df = load_dataframe(csv_path)
-    generate_screenshots(df, args.ticker, args.interval, args.time, start_skip=args.skip, max_candles=args.max_candles)
+    generate_screenshots(df, args.ticker, args.interval, args.time, start_skip=args.skip, max_candles=args.max_candles, workers=args.workers, image_format=args.image_format, png_compress=args.png_compress, renderer=args.renderer)
 
 
 if __name__ == '__main__':
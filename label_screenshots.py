@@ -1,26 +1,67 @@
 import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import json
 from typing import Optional, List, Dict, Any
 from pathlib import Path
+import os
 import shutil
 import sys
-import tkinter as tk
-from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
+import time
+import numpy as np
 import re
-
-# Reuse logic from existing modules by importing functions
-from generate_screenshots import ensure_data, load_dataframe, SCREENSHOTS_DIR
+# Tk and PIL are bound by _import_gui() on first use (PIL.Image alone by _import_image() for thumbnails),
+# and generate_screenshots (pandas/matplotlib) is imported inside the functions that need it, so --help
+# and early exits skip those imports
+tk = messagebox = ttk = Image = ImageTk = None
 
 PROCESSED_DIR = Path('processed')
+THUMBS_DIRNAME = '.thumbs'
+DISPLAY_SIZE = (560, 480)  # max image box in the labeling window
+PHOTO_CACHE_SIZE = 16  # PhotoImages kept for recently shown / prefetched screenshots
+PREFETCH_AHEAD = 4
+PREFETCH_BEHIND = 2
+_NUM_RE = re.compile(r'(\d+)')  # fallback for names outside the candle_#####.png form
+LISTING_CACHE_NAME = '.labeled_listing.json'  # per-folder candle names keyed by folder mtime
+COPY_POLL_MS = 200  # how often the Tk thread checks queued background copies for failures
+UNLINK_WORKERS = 8  # threads clearing labeled copies on --restart
+# Integer box pre-shrink (Image.reduce, like cv2.INTER_AREA) then bilinear for the remainder:
+# close to LANCZOS quality on chart images at a fraction of the cost
+THUMBNAIL_RESAMPLE = 'BILINEAR'  # PIL.Image resampling filter name
+THUMBNAIL_REDUCING_GAP = 2.0
+
+
+def _import_gui():
+    """Bind the tkinter and PIL modules used by the UI and thumbnail helpers (idempotent)."""
+    global tk, messagebox, ttk, Image, ImageTk
+    if ImageTk is not None:
+        return
+    import tkinter
+    from tkinter import messagebox as tk_messagebox, ttk as tk_ttk
+    from PIL import Image as pil_image, ImageTk as pil_imagetk
+    tk, messagebox, ttk, Image, ImageTk = tkinter, tk_messagebox, tk_ttk, pil_image, pil_imagetk
+
 
+def _import_image():
+    """Bind only PIL.Image, for thumbnail work that needs no Tk (idempotent)."""
+    global Image
+    if Image is None:
+        from PIL import Image as pil_image
+        Image = pil_image
 
+
+@functools.lru_cache(maxsize=16)
 def build_screenshot_folder(ticker: str, interval: str, time_range: str) -> Path:
-    sanitized_time = re.sub(r'\s+', '', time_range.lower())
+    from generate_screenshots import SCREENSHOTS_DIR
+    sanitized_time = ''.join(time_range.lower().split())  # same result as re.sub(r'\s+', '', ...)
     return SCREENSHOTS_DIR / f"{ticker.upper()}_{interval}_{sanitized_time}"
 
 
+@functools.lru_cache(maxsize=16)
 def build_processed_subfolders(ticker: str, interval: str, time_range: str):
     """Create processed subfolder structure supporting buy/sell operations.
+    Cached per argument tuple: folders are created on the first call only.
     Folders:
       normal     - neutral/next images
       buy        - entry screenshots for long/buy positions
@@ -28,32 +69,223 @@ def build_processed_subfolders(ticker: str, interval: str, time_range: str):
       sell       - entry screenshots for short/sell positions
       sell_exit  - exit screenshots for sell positions
     """
-    sanitized_time = re.sub(r'\s+', '', time_range.lower())
+    sanitized_time = ''.join(time_range.lower().split())
     base = PROCESSED_DIR / f"{ticker.upper()}_{interval}_{sanitized_time}"
     normal = base / 'normal'
     buy = base / 'buy'
     buy_exit = base / 'buy_exit'
     sell = base / 'sell'
     sell_exit = base / 'sell_exit'
-    base.mkdir(parents=True, exist_ok=True)
-    for d in (normal, buy, buy_exit, sell, sell_exit):
-        d.mkdir(parents=True, exist_ok=True)
+    subdirs = (normal, buy, buy_exit, sell, sell_exit)
+    # Warm start: one stat per folder instead of a failing mkdir plus a stat each
+    if not all(d.is_dir() for d in subdirs):
+        for d in subdirs:
+            os.makedirs(d, exist_ok=True)  # also creates base
     return base, normal, buy, buy_exit, sell, sell_exit
 
 
+def _is_candle_name(name: str) -> bool:
+    return name.startswith('candle_') and name.endswith('.png')
+
+
+def candle_names(folder: Path) -> List[str]:
+    """Names of candle_*.png files in folder (empty if it does not exist); no Path objects or extra stats.
+    DirEntry.is_file() answers from the cached directory entry type, so it adds no stat() on Linux.
+    """
+    try:
+        with os.scandir(folder) as it:
+            return [e.name for e in it if _is_candle_name(e.name) and e.is_file()]
+    except FileNotFoundError:
+        return []
+
+
 def list_screenshots(folder: Path):
-    return sorted([p for p in folder.glob('candle_*.png') if p.is_file()])
+    """candle_*.png files in folder ordered by candle number (not string order, so 6+ digit numbers sort right)."""
+    with os.scandir(folder) as it:
+        names = [e.name for e in it if _is_candle_name(e.name) and e.is_file()]
+    names.sort(key=lambda n: (candle_number(n), n))
+    return [folder / n for n in names]
+
+
+def candle_number(name: str) -> int:
+    """Numeric part of a candle_#####.png name (-1 when there is none)."""
+    digits = name[7:-4]
+    if name.startswith('candle_') and digits.isascii() and digits.isdigit():
+        return int(digits)
+    m = _NUM_RE.search(name)
+    return int(m.group(1)) if m else -1
+
+
+def determine_start_index(images, *dirs: Path, listing: Optional[Dict[Path, List[str]]] = None):
+    """Index of the first screenshot with no labeled copy in any of dirs (len(images) if all are labeled).
+    listing maps dir -> candle names already scanned (e.g. by main); dirs missing from it are scanned here.
+    """
+    listing = listing or {}
+    labeled = frozenset(n for d in dirs for n in (listing[d] if d in listing else candle_names(d)))
+    if not labeled or not images:
+        return 0
+    labeled_ids = np.fromiter((candle_number(n) for n in labeled), dtype=np.int64, count=len(labeled))
+    labeled_ids = labeled_ids[labeled_ids >= 0]
+    ids = np.fromiter((candle_number(p.name) for p in images), dtype=np.int64, count=len(images))
+    mask = np.isin(ids, labeled_ids) & (ids >= 0)
+    if mask.all():
+        return len(images)
+    return int(np.argmin(mask))
+
+
+COPY_MODES = ('hardlink', 'symlink', 'copy')
+
+
+def pair_ids(e_ids: np.ndarray, x_ids: np.ndarray):
+    """Pair sorted entry ids with sorted exit ids (each exit used at most once).
+    Entry k takes the first unused exit strictly greater than it. Its candidate
+    position is searchsorted(x, e_k, 'right'), but it must also come after the
+    exit taken by entry k-1: p_k = max(s_k, p_{k-1} + 1). With q_k = p_k - k this
+    becomes a running maximum, so the whole merge is vectorized.
+    Returns (entry_positions, exit_positions) into the sorted arrays.
+    """
+    if len(e_ids) == 0 or len(x_ids) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    k = np.arange(len(e_ids), dtype=np.int64)
+    s = np.searchsorted(x_ids, e_ids, side='right').astype(np.int64)
+    p = np.maximum.accumulate(s - k) + k
+    # p is strictly increasing, so matched entries form a prefix
+    matched = int(np.searchsorted(p, len(x_ids), side='left'))
+    return k[:matched], p[:matched]
 
 
-def determine_start_index(images, *dirs: Path):
-    labeled = set()
+def load_labeled_listing(base: Path, dirs) -> Dict[Path, List[str]]:
+    """Candle names per labeled folder, reusing base/LISTING_CACHE_NAME for folders whose
+    mtime (st_mtime_ns; changes whenever an entry is added or removed) matches the cached one.
+    Changed folders are rescanned and the cache rewritten. Folders modified within the last
+    couple of seconds are not cached, so coarse filesystem timestamps cannot hide a change.
+    """
+    cache_path = base / LISTING_CACHE_NAME
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    listing: Dict[Path, List[str]] = {}
+    mtimes = {}
+    stale = []
     for d in dirs:
-        for p in d.glob('candle_*.png'):
-            labeled.add(p.name)
-    for idx, img in enumerate(images):
-        if img.name not in labeled:
-            return idx
-    return len(images)
+        try:
+            mtimes[d] = os.stat(d).st_mtime_ns
+        except OSError:
+            listing[d] = []
+            continue
+        entry = cached.get(d.name)
+        if isinstance(entry, dict) and entry.get('mtime_ns') == mtimes[d]:
+            listing[d] = entry.get('names', [])
+        else:
+            stale.append(d)
+    if len(stale) > 1:
+        # readdir releases the GIL, so the folder scans overlap on slow or network disks
+        with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+            listing.update(zip(stale, pool.map(candle_names, stale)))
+    elif stale:
+        listing[stale[0]] = candle_names(stale[0])
+    fresh = {d.name: {'mtime_ns': m, 'names': listing[d]} for d, m in mtimes.items()}
+    if stale:
+        settle_ns = 2_000_000_000
+        now_ns = time.time_ns()
+        fresh = {k: v for k, v in fresh.items() if now_ns - v['mtime_ns'] > settle_ns}
+        try:
+            tmp = cache_path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(fresh, f)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass
+    return listing
+
+
+def link_or_copy(src: Path, target: Path, mode: str = 'hardlink'):
+    """Place src at target without duplicating bytes when possible.
+    mode picks the first strategy tried: 'hardlink' falls back to a relative symlink, then a copy;
+    'symlink' falls back to a copy (e.g. Windows without symlink rights); 'copy' always copies.
+    """
+    if mode == 'hardlink':
+        try:
+            os.link(src, target)
+            return
+        except OSError:
+            pass
+    if mode in ('hardlink', 'symlink'):
+        try:
+            os.symlink(os.path.relpath(src, target.parent), target)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, target)
+
+
+def candle_columns(df) -> Dict[str, Optional[np.ndarray]]:
+    """Resolve timestamp/OHLCV columns once and return them as numpy arrays.
+    Timestamp preference order: open_time -> close_time -> index.
+    Column name variants supported: Open/High/Low/Close/Volume OR lower-case equivalents.
+    Missing columns map to None.
+    """
+    cols = df.columns
+    if 'open_time' in cols:
+        ts = df['open_time'].to_numpy(dtype=object)
+    elif 'close_time' in cols:
+        ts = df['close_time'].to_numpy(dtype=object)
+    else:
+        ts = df.index.to_numpy(dtype=object)
+
+    def pick(*names):
+        for n in names:
+            if n in cols:
+                return df[n].to_numpy()
+        return None
+    return {
+        'ts': ts,
+        'open': pick('Open', 'open'),
+        'high': pick('High', 'high'),
+        'low': pick('Low', 'low'),
+        'close': pick('Close', 'close'),
+        'volume': pick('Volume', 'volume'),
+    }
+
+
+def thumbnail_path(img_path: Path, cache_dir: Path, max_size=DISPLAY_SIZE) -> Path:
+    return cache_dir / f"{img_path.stem}_{max_size[0]}x{max_size[1]}.jpg"
+
+
+def ensure_thumbnails(images: List[Path], cache_dir: Path, max_size=DISPLAY_SIZE) -> Dict[str, Path]:
+    """Downscale every screenshot into cache_dir once (JPEG q85) so the UI never resizes on navigation.
+    Screenshots in a folder share one size, so if the first already fits max_size nothing is generated.
+    Existing thumbnails newer than their source are reused. Returns {screenshot name: thumbnail path}.
+    """
+    if not images:
+        return {}
+    _import_image()
+    try:
+        with Image.open(images[0]) as im:
+            if im.width <= max_size[0] and im.height <= max_size[1]:
+                return {}
+    except Exception:
+        return {}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make(img_path: Path):
+        thumb = thumbnail_path(img_path, cache_dir, max_size)
+        try:
+            if thumb.exists() and thumb.stat().st_mtime >= img_path.stat().st_mtime:
+                return img_path.name, thumb
+            with Image.open(img_path) as im:
+                im.draft('RGB', max_size)
+                im.thumbnail(max_size, getattr(Image, THUMBNAIL_RESAMPLE), reducing_gap=THUMBNAIL_REDUCING_GAP)
+                im.convert('RGB').save(thumb, format='JPEG', quality=85)
+            return img_path.name, thumb
+        except Exception:
+            return img_path.name, None
+    # PIL releases the GIL while decoding/resampling, so threads scale here
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        return {name: thumb for name, thumb in pool.map(make, images) if thumb is not None}
 
 
 class LabelApp:
@@ -62,7 +294,11 @@ class LabelApp:
                  buy_dir: Path, buy_exit_dir: Path,
                  sell_dir: Path, sell_exit_dir: Path,
                  open_side,
-                 ohlc_df):
+                 ohlc_df,
+                 thumbs: Optional[Dict[str, Path]] = None,
+                 copy_mode: str = 'hardlink',
+                 listing: Optional[Dict[Path, List[str]]] = None):
+        _import_gui()
         # Core state
         self.root = root
         self.images = images
@@ -73,11 +309,42 @@ class LabelApp:
         self.sell_exit_dir = sell_exit_dir
         self.open_side = open_side
         self.ohlc_df = ohlc_df  # pandas DataFrame
+        self._cols = candle_columns(ohlc_df)  # timestamp/OHLCV numpy arrays, see _get_candle_data
+        self._rows = len(ohlc_df)
+        self._idx_cache: Dict[str, Optional[int]] = {}  # filename -> row index, see _filename_to_row_index
+        self._has_ohlc = all(self._cols[k] is not None for k in ('open', 'high', 'low', 'close'))
+        self.thumbs = thumbs or {}  # screenshot name -> pre-downscaled display image
+        self.copy_mode = copy_mode  # see link_or_copy
+        # Startup scan of the labeled folders from main (dir -> candle names); only valid until the first label
+        self._listing = listing or {}
         self.index = 0
+        self._n = len(images)
+        self._current: Optional[Path] = images[0] if images else None  # images[index] or None past the end
         self.photo_cache = None
-        self.history: List[Any] = []  # file copy actions and state markers
+        self._shown_path: Optional[Path] = None  # screenshot currently displayed, see update_image
+        # index -> PhotoImage (LRU); index -> decoded PIL image left by the prefetch worker
+        self._photos: 'OrderedDict[int, ImageTk.PhotoImage]' = OrderedDict()
+        self._prefetched: Dict[int, Any] = {}
+        self._pending: set = set()
+        self._pool = ThreadPoolExecutor(max_workers=2)
+        # Labeled-file placement runs off the Tk thread; one worker keeps copies in submission order
+        self._io_pool = ThreadPoolExecutor(max_workers=1)
+        # (name, future) of queued copies in submission order; only the Tk thread reads them
+        self._copies: List[tuple] = []
+        self._copy_poll_id = None  # pending root.after check of _copies, see _poll_copies
+        self._redraw_id = None  # pending after_idle redraw, see schedule_update
+        self._stats_id = None  # pending after_idle statistics refresh, see request_stats_update
+        # Undo stack of tagged entries: ('FILE', screenshot path, destination dir) or ('STATE', marker)
+        self.history: List[tuple] = []
+        # Resumed labels are folded into history on the first Back press (see undo_last)
+        self._history_built = False
         self.state_history: List[str] = []
         self.trades: List[Dict[str, Any]] = []
+        # item_id -> trade dict, and closed trades in closing order (top = the one Back re-opens)
+        self._trades_by_id: Dict[str, Dict[str, Any]] = {}
+        self._closed_trades: List[Dict[str, Any]] = []
+        # Running totals over closed trades' results, maintained by _tally_result
+        self._stat_totals = {'num': 0, 'wins': 0, 'losses': 0, 'net': 0.0, 'gross_profit': 0.0, 'gross_loss': 0.0}
         self.open_trade_item_id: Optional[str] = None
 
         # Window setup
@@ -136,9 +403,9 @@ class LabelApp:
         # Buttons
         btn_frame = tk.Frame(left_frame, bg='#222222')
         btn_frame.pack(pady=6)
-        self.btn_buy = tk.Button(btn_frame, text='Buy', width=12, command=lambda: self.open_trade('BUY'), bg='#2e7d32', fg='white')
+        self.btn_buy = tk.Button(btn_frame, text='Buy', width=12, command=self._on_buy, bg='#2e7d32', fg='white')
         self.btn_buy.grid(row=0, column=0, padx=6, pady=(0,4))
-        self.btn_sell = tk.Button(btn_frame, text='Sell', width=12, command=lambda: self.open_trade('SELL'), bg='#c62828', fg='white')
+        self.btn_sell = tk.Button(btn_frame, text='Sell', width=12, command=self._on_sell, bg='#c62828', fg='white')
         self.btn_sell.grid(row=0, column=1, padx=6, pady=(0,4))
         self.btn_next = tk.Button(btn_frame, text='Next', width=12, command=self.mark_normal, bg='#555555', fg='white')
         self.btn_next.grid(row=0, column=2, padx=6, pady=(0,4))
@@ -153,25 +420,42 @@ class LabelApp:
         self.candle_info.pack(pady=(0,6))
 
         # Shortcuts
-        self.root.bind('<Up>', lambda e: self.open_trade('BUY'))
-        self.root.bind('<Down>', lambda e: self.open_trade('SELL'))
-        self.root.bind('<space>', lambda e: self.mark_normal())
-        self.root.bind('<BackSpace>', lambda e: self.undo_last())
-        self.root.bind('<Escape>', lambda e: self.root.quit())
+        self.root.bind('<Up>', self._on_buy)
+        self.root.bind('<Down>', self._on_sell)
+        self.root.bind('<space>', self._on_next)
+        self.root.bind('<BackSpace>', self._on_back)
+        self.root.bind('<Escape>', self._on_quit)
 
         # Initial rendering and preload of existing trades
         self.update_image()
         self.update_button_states()
         self.preload_trades()
-        self.update_stats()
+        self._listing = {}
+        self.request_stats_update()
+
+    # Key bindings and Buy/Sell buttons call these directly (bindings pass the Tk event)
+    def _on_buy(self, _event=None):
+        self.open_trade('BUY')
+
+    def _on_sell(self, _event=None):
+        self.open_trade('SELL')
+
+    def _on_next(self, _event=None):
+        self.mark_normal()
+
+    def _on_back(self, _event=None):
+        self.undo_last()
+
+    def _on_quit(self, _event=None):
+        self.root.quit()
 
     # --- Button / state helpers ---
     def update_button_states(self):
         """Configure button states based on whether a side is currently open."""
         if self.open_side is None:
             # No open trade: Buy/Sell enabled, standard colors, Next enabled
-            self.btn_buy.config(text='Buy', state=tk.NORMAL, command=lambda: self.open_trade('BUY'), bg='#2e7d32', fg='white')
-            self.btn_sell.config(text='Sell', state=tk.NORMAL, command=lambda: self.open_trade('SELL'), bg='#c62828', fg='white')
+            self.btn_buy.config(text='Buy', state=tk.NORMAL, command=self._on_buy, bg='#2e7d32', fg='white')
+            self.btn_sell.config(text='Sell', state=tk.NORMAL, command=self._on_sell, bg='#c62828', fg='white')
             self.btn_next.config(text='Next', state=tk.NORMAL, command=self.mark_normal, bg='#555555', fg='white')
         else:
             # One side open - allow exit via that side's button; disable other side
@@ -229,57 +513,30 @@ class LabelApp:
     # --- Trade helpers ---
     def _filename_to_row_index(self, filename: str) -> int | None:
         """Extract 0-based row index from candle_00001 style filename.
-        Returns None if pattern not matched or out of range.
+        Returns None if pattern not matched or out of range. Memoized per filename.
         """
-        m = re.search(r'(\d+)', filename)
-        if not m:
-            return None
+        try:
+            return self._idx_cache[filename]
+        except KeyError:
+            pass
+        num = candle_number(filename)
         # Filenames are 1-based; convert to 0-based
-        idx = int(m.group(1)) - 1
-        if 0 <= idx < len(self.ohlc_df):
-            return idx
-        return None
+        idx = num - 1 if 0 < num <= self._rows else None
+        self._idx_cache[filename] = idx
+        return idx
 
     # --- Unified candle data retrieval ---
     def _get_candle_data(self, idx: int):
         """Return tuple (timestamp, open, high, low, close, volume) for a dataframe row index.
-        Handles multiple possible column naming conventions and timestamp fallbacks.
-        Returns None if idx out of range or an unexpected error occurs.
-        Timestamp preference order: open_time -> close_time -> index value -> ''
-        Column name variants supported: Open/High/Low/Close/Volume OR lower-case equivalents.
+        Reads the column arrays resolved once by candle_columns (no per-call Series/iloc).
+        Returns None if idx out of range or the OHLC columns are missing.
         """
-        try:
-            if idx < 0 or idx >= len(self.ohlc_df):
-                return None
-            row = self.ohlc_df.iloc[idx]
-            cols = self.ohlc_df.columns
-            # Timestamp resolution
-            if 'open_time' in cols:
-                ts = row['open_time']
-            elif 'close_time' in cols:
-                ts = row['close_time']
-            else:
-                try:
-                    ts = self.ohlc_df.index[idx]
-                except Exception:
-                    ts = ''
-            # Column variants
-            open_col = 'Open' if 'Open' in row else ('open' if 'open' in row else None)
-            high_col = 'High' if 'High' in row else ('high' if 'high' in row else None)
-            low_col = 'Low' if 'Low' in row else ('low' if 'low' in row else None)
-            close_col = 'Close' if 'Close' in row else ('close' if 'close' in row else None)
-            vol_col = 'Volume' if 'Volume' in row else ('volume' if 'volume' in row else None)
-            if not all([open_col, high_col, low_col, close_col]):
-                # Required OHLC columns missing – return None to signal failure
-                return None
-            o = row[open_col]
-            h = row[high_col]
-            low_v = row[low_col]
-            c = row[close_col]
-            v = row[vol_col] if vol_col else ''
-            return ts, o, h, low_v, c, v
-        except Exception:
+        cols = self._cols
+        if idx < 0 or idx >= self._rows or not self._has_ohlc:
             return None
+        vol = cols['volume']
+        return (cols['ts'][idx], cols['open'][idx], cols['high'][idx], cols['low'][idx], cols['close'][idx],
+                vol[idx] if vol is not None else '')
 
     def _row_entry_values(self, idx: int):
         data = self._get_candle_data(idx)
@@ -297,12 +554,45 @@ class LabelApp:
         if idx is None:
             return None
         dt, price = self._row_entry_values(idx)
-        item_id = self.trade_table.insert('', tk.END, values=(side, dt, f"{price:.4f}", '', '', ''))
-        self.trades.append({'item_id': item_id, 'entry_idx': idx, 'entry_price': price,
-                            'exit_idx': None, 'exit_price': None, 'side': side})
+        entry_cells = (dt, f"{price:.4f}")
+        item_id = self.trade_table.insert('', tk.END, values=(side, *entry_cells, '', '', ''))
+        trade = {'item_id': item_id, 'entry_idx': idx, 'entry_price': price,
+                 'exit_idx': None, 'exit_price': None, 'result': None, 'side': side,
+                 'entry_cells': entry_cells}
+        self.trades.append(trade)
+        self._trades_by_id[item_id] = trade
         self.open_trade_item_id = item_id
         return item_id
 
+    def _insert_trade(self, side: str, entry_name: str, exit_name: Optional[str] = None):
+        """Add a resumed trade (closed when exit_name is given) as a single fully populated row.
+        Unlike _add_trade_entry/_close_trade this leaves open_trade_item_id and the stats alone.
+        """
+        idx = self._filename_to_row_index(entry_name)
+        if idx is None:
+            return None
+        dt, price = self._row_entry_values(idx)
+        entry_cells = (dt, f"{price:.4f}")
+        trade = {'item_id': None, 'entry_idx': idx, 'entry_price': price,
+                 'exit_idx': None, 'exit_price': None, 'result': None, 'side': side,
+                 'entry_cells': entry_cells}
+        values = [side, *entry_cells, '', '', '']
+        exit_idx = self._filename_to_row_index(exit_name) if exit_name else None
+        if exit_idx is not None:
+            exit_dt, exit_price = self._row_entry_values(exit_idx)
+            result = exit_price - price if side == 'BUY' else price - exit_price
+            trade['exit_idx'] = exit_idx
+            trade['exit_price'] = exit_price
+            trade['result'] = round(result, 4)  # value shown in the table's result column
+            values[3:] = [exit_dt, f"{exit_price:.4f}", f"{result:.4f}"]
+        trade['item_id'] = self.trade_table.insert('', tk.END, values=values)
+        self.trades.append(trade)
+        self._trades_by_id[trade['item_id']] = trade
+        if trade['exit_idx'] is not None:
+            self._closed_trades.append(trade)
+            self._tally_result(trade['result'])
+        return trade
+
     def _close_trade(self, filename: str):
         if not self.open_trade_item_id:
             return
@@ -310,7 +600,7 @@ class LabelApp:
         if idx is None:
             return
         dt, price = self._row_entry_values(idx)
-        trade = next((t for t in reversed(self.trades) if t['item_id'] == self.open_trade_item_id), None)
+        trade = self._trades_by_id.get(self.open_trade_item_id)
         if not trade:
             return
         trade['exit_idx'] = idx
@@ -320,52 +610,48 @@ class LabelApp:
             result = price - trade['entry_price']
         else:
             result = trade['entry_price'] - price
+        trade['result'] = round(result, 4)  # value shown in the table's result column
+        self._closed_trades.append(trade)
+        self._tally_result(trade['result'])
         self.trade_table.item(self.open_trade_item_id, values=(
-            trade['side'],
-            self.trade_table.set(self.open_trade_item_id, 'entry_date'),
-            self.trade_table.set(self.open_trade_item_id, 'entry_price'),
-            dt, f"{price:.4f}", f"{result:.4f}"
+            trade['side'], *trade['entry_cells'], dt, f"{price:.4f}", f"{result:.4f}"
         ))
         self.open_trade_item_id = None
-        self.update_stats()
+        self.request_stats_update()
+
+    def _labeled_names(self, dir_path: Path) -> List[str]:
+        """Candle names in a labeled folder, from the startup listing when available."""
+        names = self._listing.get(dir_path)
+        return names if names is not None else candle_names(dir_path)
 
     def preload_trades(self):
         """Reconstruct existing trades from buy/sell + exit folders.
         We pair each entry with the next exit in its corresponding side's exit folder.
         If there are more entries than exits, the last unmatched entry is considered open.
         """
-        def file_num(p: Path):
-            m = re.search(r'(\d+)', p.name)
-            return int(m.group(1)) if m else 10**12
-        # Prepare lists
-        buy_entries = sorted(self.buy_dir.glob('candle_*.png'), key=lambda p: p.name)
-        buy_exits = sorted(self.buy_exit_dir.glob('candle_*.png'), key=lambda p: p.name)
-        sell_entries = sorted(self.sell_dir.glob('candle_*.png'), key=lambda p: p.name)
-        sell_exits = sorted(self.sell_exit_dir.glob('candle_*.png'), key=lambda p: p.name)
+        def file_num(name: str):
+            num = candle_number(name)
+            return num if num >= 0 else 10**12
+        # Prepare lists (bare names from one scandir per folder; Path objects are never needed),
+        # ordered by candle number
+        buy_entries = sorted(self._labeled_names(self.buy_dir), key=file_num)
+        buy_exits = sorted(self._labeled_names(self.buy_exit_dir), key=file_num)
+        sell_entries = sorted(self._labeled_names(self.sell_dir), key=file_num)
+        sell_exits = sorted(self._labeled_names(self.sell_exit_dir), key=file_num)
 
         def pair_entries(entries, exits, side):
-            used = set()
-            exit_nums = [(file_num(f), f) for f in exits]
+            e_ids = np.fromiter(map(file_num, entries), dtype=np.int64, count=len(entries))
+            x_ids = np.fromiter(map(file_num, exits), dtype=np.int64, count=len(exits))
+            # Matched entries form a prefix; entry k closes at exits[x_pos[k]]
+            x_pos = pair_ids(e_ids, x_ids)[1].tolist()
             last_open_trade_id = None
-            for e in entries:
-                e_num = file_num(e)
-                # add trade entry row
-                self._add_trade_entry(e.name, side)
-                # attempt to find exit with num > e_num not used
-                candidate = None
-                for num, f in exit_nums:
-                    if num > e_num and f not in used:
-                        candidate = f
-                        used.add(f)
-                        break
-                if candidate is not None:
-                    prev_open = self.open_trade_item_id
-                    self._close_trade(candidate.name)
-                    if self.open_trade_item_id == prev_open:
-                        self.open_trade_item_id = None
-                else:
+            for k, e in enumerate(entries):
+                candidate = exits[x_pos[k]] if k < len(x_pos) else None
+                # one Treeview insert with the row's final values (no insert-then-rewrite per trade)
+                trade = self._insert_trade(side, e, candidate)
+                if trade is not None and candidate is None:
                     # remains open for now
-                    last_open_trade_id = self.open_trade_item_id
+                    last_open_trade_id = trade['item_id']
             return last_open_trade_id
 
         last_buy_open = pair_entries(buy_entries, buy_exits, 'BUY')
@@ -377,7 +663,7 @@ class LabelApp:
         def trade_start_idx(item_id):
             if not item_id:
                 return -1
-            trade = next((t for t in self.trades if t['item_id'] == item_id), None)
+            trade = self._trades_by_id.get(item_id)
             return trade['entry_idx'] if trade else -1
         b_idx = trade_start_idx(last_buy_open)
         s_idx = trade_start_idx(last_sell_open)
@@ -395,14 +681,15 @@ class LabelApp:
             self.open_trade_item_id = last_sell_open
             self.open_side = 'SELL'
         # stats update
-        self.update_stats()
-        # Rebuild synthetic history so undo works uniformly (root-cause approach vs fallback heuristics)
-        self.rebuild_history()
+        self.request_stats_update()
+        # Synthetic history for the resumed labels is rebuilt lazily on the first Back press
+        # (see undo_last), so startup does not scale with the number of labeled files
+        self._history_built = False
 
     def rebuild_history(self):
         """Rebuild the history stack from existing labeled files in chronological order.
         This enables consistent single-step undo behavior after a resume.
-        History model: sequence of (file_copy) followed immediately (for entries/exits) by a STATE marker.
+        History model: sequence of ('FILE', ...) entries, each followed immediately (for entries/exits) by a STATE marker.
         We infer chronology from filename numeric order.
         Limitations: Cannot distinguish interleaving of normals vs trades beyond filename order, which is acceptable
         because labeling progresses strictly forward.
@@ -411,11 +698,11 @@ class LabelApp:
         # Collect all labeled files with their semantic types
         def collect(dir_path: Path, kind: str):
             out = []
-            for p in dir_path.glob('candle_*.png'):
-                m = re.search(r'(\d+)', p.name)
-                if not m:
+            for name in self._labeled_names(dir_path):
+                num = candle_number(name)
+                if num < 0:
                     continue
-                out.append((int(m.group(1)), p, kind))
+                out.append((num, name, dir_path, kind))
             return out
         items = []
         items += collect(self.normal_dir, 'NORMAL')
@@ -429,12 +716,12 @@ class LabelApp:
         # For file copy we need the original screenshot path (self.images[index-1]) but we only have filename.
         # We'll reconstruct by mapping filename -> source path via self.images.
         filename_to_source = {p.name: p for p in self.images}
-        for _num, file_path, kind in items:
-            src = filename_to_source.get(file_path.name)
+        for _num, name, dir_path, kind in items:
+            src = filename_to_source.get(name)
             if not src:
                 continue
             # Push synthetic file copy action
-            self.history.append((src, file_path.parent))
+            self.history.append(('FILE', src, dir_path))
             if kind == 'BUY_ENTRY':
                 self.history.append(('STATE', 'OPEN_BUY'))
             elif kind == 'SELL_ENTRY':
@@ -448,12 +735,22 @@ class LabelApp:
 
     def set_index(self, value):
         self.index = value
+        self._current = self.images[value] if 0 <= value < self._n else None
+        self.schedule_update()
+
+    def schedule_update(self):
+        """Redraw at the next idle moment; index changes queued before then (key repeat on
+        Enter/Space/Backspace) collapse into a single update_image for the final position.
+        """
+        if self._redraw_id is None:
+            self._redraw_id = self.root.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._redraw_id = None
         self.update_image()
 
     def current_image(self):
-        if 0 <= self.index < len(self.images):
-            return self.images[self.index]
-        return None
+        return self._current
 
     def update_image(self):
         img_path = self.current_image()
@@ -465,20 +762,110 @@ class LabelApp:
             self.btn_sell.config(state=tk.DISABLED)
             self.btn_next.config(state=tk.DISABLED)
             self.candle_info.config(text='')
+            self._shown_path = None
+            return
+        if img_path == self._shown_path:
+            # Already on screen (e.g. Back at the first image, or Next+Back coalesced into one redraw);
+            # status and candle info depend only on the index, so there is nothing to refresh
             return
         # Load & display image
         try:
-            with Image.open(img_path) as im:
-                max_w, max_h = 560, 480
-                im.thumbnail((max_w, max_h))
-                self.photo_cache = ImageTk.PhotoImage(im)
-                self.canvas.config(image=self.photo_cache, text='')
+            self.photo_cache = self._photo_for(self.index, img_path)
+            self.canvas.config(image=self.photo_cache, text='')
+            self._shown_path = img_path
         except Exception as e:
             self.canvas.config(text=f"Error loading image: {e}")
+            self._shown_path = None
+        self._prefetch_around(self.index)
         # Status: filename + position (e.g., candle_00042.png 42/2400)
-        self.status.config(text=f"{img_path.name} {self.index+1}/{len(self.images)}")
+        self.status.config(text=f"{img_path.name} {self.index+1}/{self._n}")
         self.update_candle_info(img_path.name)
 
+    def _decode_display_image(self, img_path: Path):
+        """Open the display version of a screenshot (thumbnail if cached) as a loaded PIL image."""
+        with Image.open(self.thumbs.get(img_path.name, img_path)) as im:
+            # Only legacy oversized screenshots without a cached thumbnail need resampling
+            if im.width > DISPLAY_SIZE[0] or im.height > DISPLAY_SIZE[1]:
+                im.draft('RGB', DISPLAY_SIZE)  # shrink-on-load for JPEG sources; no-op for PNG
+                im.thumbnail(DISPLAY_SIZE, getattr(Image, THUMBNAIL_RESAMPLE), reducing_gap=THUMBNAIL_REDUCING_GAP)
+            im.load()
+            return im
+
+    def _photo_for(self, index: int, img_path: Path):
+        """PhotoImage for images[index]: LRU hit, else from a prefetched PIL image, else decoded now.
+        PhotoImages are only ever created here, on the Tk thread.
+        """
+        photo = self._photos.get(index)
+        if photo is not None:
+            self._photos.move_to_end(index)
+            return photo
+        im = self._prefetched.pop(index, None)
+        photo = None
+        if im is None and img_path.name not in self.thumbs:
+            # Screenshots are rendered at display size: let Tk decode the PNG itself,
+            # skipping the PIL decode and the copy into an ImageTk photo
+            try:
+                photo = tk.PhotoImage(file=str(img_path))
+            except tk.TclError:
+                photo = None
+            if photo is not None and (photo.width() > DISPLAY_SIZE[0] or photo.height() > DISPLAY_SIZE[1]):
+                # Oversized without a cached thumbnail: shrink by the smallest integer factor that fits
+                # (Tk subsample keeps every k-th pixel, so no PIL decode or resample is needed)
+                k = max(-(-photo.width() // DISPLAY_SIZE[0]), -(-photo.height() // DISPLAY_SIZE[1]))
+                photo = photo.subsample(k, k)
+        if photo is None:
+            if im is None:
+                im = self._decode_display_image(img_path)
+            photo = self._recycle_photo(im.size)
+            if photo is not None:
+                photo.paste(im)
+            else:
+                photo = ImageTk.PhotoImage(im)
+        self._photos[index] = photo
+        while len(self._photos) > PHOTO_CACHE_SIZE:
+            self._photos.popitem(last=False)
+        return photo
+
+    def _recycle_photo(self, size):
+        """Once the LRU is full, evict its oldest entry and return it for reuse if it is an
+        ImageTk photo of the given size, so Tk repaints an existing image instead of
+        allocating a new one per screenshot (all screenshots in a folder share a size).
+        The oldest entry is never the one on screen: the displayed photo is always most recent.
+        """
+        if len(self._photos) < PHOTO_CACHE_SIZE:
+            return None
+        _index, photo = self._photos.popitem(last=False)
+        if isinstance(photo, ImageTk.PhotoImage) and (photo.width(), photo.height()) == tuple(size):
+            return photo
+        return None
+
+    def _prefetch_worker(self, index: int):
+        try:
+            self._prefetched[index] = self._decode_display_image(self.images[index])
+        except Exception:
+            pass
+        finally:
+            self._pending.discard(index)
+
+    def _prefetch_around(self, index: int):
+        """Decode nearby screenshots in the background so the next Enter/Back is a cache hit."""
+        lo = max(0, index - PREFETCH_BEHIND)
+        hi = min(self._n, index + PREFETCH_AHEAD + 1)
+        # Forget decoded images that drifted out of the window
+        for i in [i for i in list(self._prefetched) if i < lo or i >= hi]:
+            self._prefetched.pop(i, None)
+        for i in range(lo, hi):
+            if i in self._photos or i in self._prefetched or i in self._pending:
+                continue
+            self._pending.add(i)
+            self._pool.submit(self._prefetch_worker, i)
+
+    def close(self):
+        """Drop pending prefetches so interpreter exit does not wait on them, but finish queued copies."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool.shutdown(wait=True)
+        self._report_copies(show=False)
+
     def update_candle_info(self, filename: str):
         idx = self._filename_to_row_index(filename)
         if idx is None:
@@ -496,63 +883,96 @@ class LabelApp:
         if img_path is None:
             return
         target = destination_dir / img_path.name
-        try:
-            if not target.exists():
-                shutil.copy2(img_path, target)
-                # push to history only when newly copied
-                self.history.append((img_path, destination_dir))
-        except Exception as e:
-            messagebox.showerror('Copy Error', f'Failed to copy {img_path.name}: {e}')
+        if target.exists():
+            return
+        # Place the file in the background so slow disks do not stall the UI; history is
+        # updated optimistically (undo and rebuild_history drain pending copies first)
+        # The worker never touches Tk: failures are picked up by _poll_copies on the Tk thread
+        self._copies.append((img_path.name, self._io_pool.submit(link_or_copy, img_path, target, self.copy_mode)))
+        if self._copy_poll_id is None:
+            self._copy_poll_id = self.root.after(COPY_POLL_MS, self._poll_copies)
+        # push to history only when newly copied
+        self.history.append(('FILE', img_path, destination_dir))
+
+    def _report_copies(self, show: bool = True):
+        """Forget finished copies and report the failed ones (message box, or [WARN] once the window is gone)."""
+        failed = [(name, f.exception()) for name, f in self._copies if f.done() and f.exception() is not None]
+        # Update the queue before showing anything: the message box runs a nested event loop
+        self._copies = [(name, f) for name, f in self._copies if not f.done()]
+        for name, e in failed:
+            if show:
+                messagebox.showerror('Copy Error', f'Failed to copy {name}: {e}')
+            else:
+                print(f"[WARN] Failed to copy {name}: {e}")
+
+    def _poll_copies(self):
+        self._copy_poll_id = None
+        self._report_copies()
+        if self._copies and self._copy_poll_id is None:
+            self._copy_poll_id = self.root.after(COPY_POLL_MS, self._poll_copies)
+
+    def wait_for_copies(self):
+        """Block until every submitted copy has finished (before undo reads or removes files)."""
+        if self._copies:
+            # One worker runs copies in order, so once the newest is done all earlier ones are too
+            self._copies[-1][1].exception()
+            self._report_copies()
 
     def advance(self):
-        self.index += 1
-        self.update_image()
+        self.set_index(self.index + 1)
 
     def undo_last(self):
+        self.wait_for_copies()
+        if not self._history_built:
+            # Rebuild from disk so undo works uniformly across resumed and new labels
+            # (root-cause approach vs fallback heuristics). Files copied this session are on
+            # disk too, so the rebuilt stack replaces the in-session entries one for one.
+            self.rebuild_history()
+            self._history_built = True
         if not self.history:
             # Allow pure navigation backwards even if no undoable action exists
             if self.index > 0:
                 # With reconstructed history, this branch should rarely execute (only at first image)
-                self.index -= 1
-                self.update_image()
+                self.set_index(self.index - 1)
             else:
                 # At first image: show its filename (if any)
-                self.update_image()
+                self.schedule_update()
             return
         last_item = self.history.pop()
-        if isinstance(last_item, tuple) and last_item and last_item[0] == 'STATE':
+        if last_item[0] == 'STATE':
             marker_type = last_item[1]
             if marker_type.startswith('OPEN_'):
                 # Undo an OPEN_{SIDE}
                 if self.trades:
                     trade = self.trades.pop()
+                    self._trades_by_id.pop(trade['item_id'], None)
+                    if self._closed_trades and self._closed_trades[-1] is trade:
+                        self._closed_trades.pop()
+                        self._tally_result(trade['result'], -1)
                     try:
                         self.trade_table.delete(trade['item_id'])
                     except Exception:
                         pass
                 self.open_side = None
                 self.open_trade_item_id = None
-                self.update_stats()
+                self.request_stats_update()
             elif marker_type.startswith('CLOSE_'):
                 # Undo a CLOSE_{SIDE}
-                for trade in reversed(self.trades):
-                    if trade['exit_idx'] is not None:
-                        trade['exit_idx'] = None
-                        trade['exit_price'] = None
-                        self.trade_table.item(trade['item_id'], values=(
-                            trade.get('side',''),
-                            self.trade_table.set(trade['item_id'], 'entry_date'),
-                            self.trade_table.set(trade['item_id'], 'entry_price'),
-                            '', '', ''
-                        ))
-                        self.open_trade_item_id = trade['item_id']
-                        self.open_side = trade.get('side')
-                        break
-                self.update_stats()
+                if self._closed_trades:
+                    trade = self._closed_trades.pop()
+                    self._tally_result(trade['result'], -1)
+                    trade['exit_idx'] = None
+                    trade['exit_price'] = None
+                    trade['result'] = None
+                    self.trade_table.item(trade['item_id'], values=(
+                        trade.get('side',''), *trade['entry_cells'], '', '', ''
+                    ))
+                    self.open_trade_item_id = trade['item_id']
+                    self.open_side = trade.get('side')
+                self.request_stats_update()
             # Also remove the immediately preceding file copy entry if present so one Back press is atomic
-            if self.history and isinstance(self.history[-1], tuple) and isinstance(self.history[-1][0], Path):
-                file_item = self.history.pop()
-                img_path_obj, dest_dir = file_item
+            if self.history and self.history[-1][0] == 'FILE':
+                _kind, img_path_obj, dest_dir = self.history.pop()
                 target_file = dest_dir / img_path_obj.name
                 try:
                     if target_file.exists():
@@ -560,13 +980,12 @@ class LabelApp:
                 except Exception:
                     pass
                 # Move index back to reflect removal
-                self.index = max(0, self.index - 1)
-                self.update_image()
+                self.set_index(max(0, self.index - 1))
             # Keep only filename in status
             self.update_button_states()
             return
-        # Otherwise it's a file copy tuple (img_path, destination_dir)
-        last_img, last_dir = last_item
+        # Otherwise it's a file copy entry ('FILE', img_path, destination_dir)
+        _kind, last_img, last_dir = last_item
         target = last_dir / last_img.name
         try:
             if target.exists():
@@ -574,39 +993,57 @@ class LabelApp:
         except Exception as e:
             messagebox.showwarning('Undo Warning', f'Could not remove {target.name}: {e}')
         # Move index back, update display
-        self.index = max(0, self.index - 1)
-        self.update_image()
+        self.set_index(max(0, self.index - 1))
         # Only filename shown (update_image already sets it)
         self.update_button_states()
-        self.update_stats()
+        self.request_stats_update()
 
     # --- Statistics ---
+    def _tally_result(self, result: float, sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) a closed trade's result from the running statistics."""
+        totals = self._stat_totals
+        totals['num'] += sign
+        totals['net'] += sign * result
+        if result > 0:
+            totals['wins'] += sign
+            totals['gross_profit'] += sign * result
+        elif result < 0:
+            totals['losses'] += sign
+            totals['gross_loss'] -= sign * result  # kept positive
+        # Zero a sum exactly once its count is empty, so add/remove round-off cannot linger
+        if totals['num'] == 0:
+            totals['net'] = 0.0
+        if totals['wins'] == 0:
+            totals['gross_profit'] = 0.0
+        if totals['losses'] == 0:
+            totals['gross_loss'] = 0.0
+
+    def request_stats_update(self):
+        """Recompute the statistics once at the next idle moment, however many trade changes
+        (a close plus its undo, rapid Back presses, the initial preload) queue up before then.
+        """
+        if self._stats_id is None:
+            self._stats_id = self.root.after_idle(self._flush_stats)
+
+    def _flush_stats(self):
+        self._stats_id = None
+        self.update_stats()
+
     def update_stats(self):
-        """Compute and display trade statistics for CLOSED trades only."""
-        closed = [t for t in self.trades if t['exit_idx'] is not None]
-        num = len(closed)
+        """Display trade statistics for CLOSED trades only, from the running totals."""
+        totals = self._stat_totals
+        num = totals['num']
         if num == 0:
             self.stat_trades.config(text='Number of trades: 0')
             self.stat_net.config(text='Profit/Loss: 0.00')
             self.stat_ratio.config(text='Profit/Loss ratio: 0 / 0')
             self.stat_factor.config(text='Profit factor: 0.00')
             return
-        results = []
-        for t in closed:
-            # Retrieve result from tree to ensure consistent formatting
-            val = self.trade_table.set(t['item_id'], 'result')
-            try:
-                results.append(float(val))
-            except (TypeError, ValueError):
-                pass
-        num = len(results)
-        wins = [r for r in results if r > 0]
-        losses = [r for r in results if r < 0]
-        win_count = len(wins)
-        loss_count = len(losses)
-        net = sum(results)
-        gross_profit = sum(wins) if wins else 0.0
-        gross_loss = -sum(losses) if losses else 0.0  # make positive
+        win_count = totals['wins']
+        loss_count = totals['losses']
+        net = totals['net']
+        gross_profit = totals['gross_profit']
+        gross_loss = totals['gross_loss']
         # Profit/loss ratio: wins count / losses count (avoid div0)
         if loss_count == 0:
             ratio_text = f"{win_count} / {loss_count} (∞)" if win_count > 0 else "0 / 0"
@@ -634,22 +1071,27 @@ def main():
     parser.add_argument('--skip', type=int, default=480, help='Skip first N candles when generating screenshots if generation needed')
     parser.add_argument('--max-candles', type=int, default=96, dest='max_candles', help='Max candles per screenshot window if generation needed (default 96)')
     parser.add_argument('--restart', action='store_true', help='Start labeling from the first screenshot (clears existing labeled copies in processed folder)')
+    parser.add_argument('--copy-mode', choices=COPY_MODES, default='hardlink', dest='copy_mode', help='How labeled files are placed: hardlink (default, falls back to symlink then copy), symlink (falls back to copy) or copy')
     args = parser.parse_args()
+    from generate_screenshots import ensure_data, load_dataframe
 
     # Ensure OHLC data file exists (reuse generation logic's ensure_data) with source
     csv_path = ensure_data(args.ticker, args.interval, args.time, args.refresh, args.source)
 
     # Ensure screenshots exist; if not, generate them by invoking the same functions
     screenshot_folder = build_screenshot_folder(args.ticker, args.interval, args.time)
-    if not screenshot_folder.exists() or not any(screenshot_folder.glob('candle_*.png')):
+    # The same listing serves the existence check and the labeling order
+    images = list_screenshots(screenshot_folder) if screenshot_folder.is_dir() else []
+    ohlc_df = None
+    if not images:
         print('[INFO] No screenshots found. Generating...')
-        df = load_dataframe(csv_path)
+        ohlc_df = load_dataframe(csv_path)
         from generate_screenshots import generate_screenshots
-        generate_screenshots(df, args.ticker, args.interval, args.time, start_skip=args.skip, max_candles=args.max_candles)
+        # The generator returns the frames it wrote (in candle order), so no rescan is needed
+        images = generate_screenshots(ohlc_df, args.ticker, args.interval, args.time, start_skip=args.skip, max_candles=args.max_candles)
     else:
         print(f'[INFO] Using existing screenshots: {screenshot_folder}')
 
-    images = list_screenshots(screenshot_folder)
     if not images:
         print('[WARN] No images to label after generation attempt. Exiting.')
         return 0
@@ -657,29 +1099,44 @@ def main():
     base, normal_dir, buy_dir, buy_exit_dir, sell_dir, sell_exit_dir = build_processed_subfolders(args.ticker, args.interval, args.time)
 
     # If restart requested, clear existing labeled files only (not screenshots)
+    cleared = False  # every labeled copy is known to be gone
     if args.restart:
-        removed = 0
+        paths = []
         for d in (normal_dir, buy_dir, buy_exit_dir, sell_dir, sell_exit_dir):
-            for f in d.glob('candle_*.png'):
-                try:
-                    f.unlink()
-                    removed += 1
-                except Exception as e:
-                    print(f"[WARN] Could not remove {f}: {e}")
+            with os.scandir(d) as it:
+                paths += [e.path for e in it if _is_candle_name(e.name)]
+
+        def remove(f: str) -> bool:
+            try:
+                os.unlink(f)
+                return True
+            except OSError as e:
+                print(f"[WARN] Could not remove {f}: {e}")
+                return False
+        # unlink is syscall-bound, so a few threads overlap the filesystem round trips
+        with ThreadPoolExecutor(max_workers=UNLINK_WORKERS) as pool:
+            removed = sum(pool.map(remove, paths))
         msg = f"removed {removed} previously labeled images" if removed else "no existing labeled images to remove"
         print(f"[INFO] Restart requested: {msg}.")
+        cleared = removed == len(paths)
+
+    # One scandir per changed labeled folder (cached by mtime otherwise), shared by the resume
+    # position and the open-side detection; after a complete restart every folder is known to be
+    # empty, but files that could not be removed must still be seen
+    label_dirs = (normal_dir, buy_dir, buy_exit_dir, sell_dir, sell_exit_dir)
+    listing = {d: [] for d in label_dirs} if cleared else load_labeled_listing(base, label_dirs)
 
     # Determine resume position
-    start_index = 0 if args.restart else determine_start_index(images, normal_dir, buy_dir, buy_exit_dir, sell_dir, sell_exit_dir)
+    start_index = 0 if args.restart else determine_start_index(images, *label_dirs, listing=listing)
     if start_index >= len(images):
         print('[INFO] All images already labeled.')
         return 0
 
     # Detect open side for resume (if any) based on unmatched entry vs exit counts per side
-    buy_entries = len(list(buy_dir.glob('candle_*.png')))
-    buy_exits = len(list(buy_exit_dir.glob('candle_*.png')))
-    sell_entries = len(list(sell_dir.glob('candle_*.png')))
-    sell_exits = len(list(sell_exit_dir.glob('candle_*.png')))
+    buy_entries = len(listing[buy_dir])
+    buy_exits = len(listing[buy_exit_dir])
+    sell_entries = len(listing[sell_dir])
+    sell_exits = len(listing[sell_exit_dir])
     open_side = None
     if buy_entries > buy_exits:
         open_side = 'BUY'
@@ -688,22 +1145,34 @@ def main():
         if open_side == 'BUY':
             # compare latest unmatched entry indices
             def last_idx(dir_path):
-                files = sorted(dir_path.glob('candle_*.png'))
-                if not files:
-                    return -1
-                m = re.search(r'(\d+)', files[-1].name)
-                return int(m.group(1)) if m else -1
+                return max((candle_number(n) for n in listing[dir_path]), default=-1)
             if last_idx(sell_dir) > last_idx(buy_dir):
                 open_side = 'SELL'
         else:
             open_side = 'SELL'
 
-    # Load OHLC dataframe for trade table (ensure it's loaded even if screenshots pre-exist)
-    ohlc_df = load_dataframe(csv_path)
+    # Load OHLC dataframe for trade table (ensure it's loaded even if screenshots pre-exist);
+    # parsed only once per run, deferred until the early exits above have passed, and on a
+    # background thread so the CSV parse overlaps the thumbnail check and the Tk startup
+    ohlc_future = None
+    if ohlc_df is None:
+        loader = ThreadPoolExecutor(max_workers=1)
+        ohlc_future = loader.submit(load_dataframe, csv_path)
+        loader.shutdown(wait=False)
+
+    thumbs = ensure_thumbnails(images, base / THUMBS_DIRNAME)
+    if thumbs:
+        print(f"[INFO] Display thumbnails ready: {len(thumbs)} in {base / THUMBS_DIRNAME}")
+
+    _import_gui()
     root = tk.Tk()
-    app = LabelApp(root, images, normal_dir, buy_dir, buy_exit_dir, sell_dir, sell_exit_dir, open_side, ohlc_df)
+    # The first screenshot already shows its candle's OHLC values, so the frame is needed up front
+    if ohlc_future is not None:
+        ohlc_df = ohlc_future.result()
+    app = LabelApp(root, images, normal_dir, buy_dir, buy_exit_dir, sell_dir, sell_exit_dir, open_side, ohlc_df, thumbs=thumbs, copy_mode=args.copy_mode, listing=listing)
     app.set_index(start_index)
     root.mainloop()
+    app.close()
     return 0
 
 